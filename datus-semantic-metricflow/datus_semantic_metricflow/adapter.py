@@ -1,10 +1,13 @@
+import asyncio
 import inspect
+from functools import lru_cache
 from pathlib import Path
 from types import SimpleNamespace
 from typing import Any, Dict, List, Optional, Set, Tuple
 
 import logging
 import os
+import time
 
 import yaml
 
@@ -38,6 +41,15 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# PyYAML only ships the libyaml-backed loader when built against libyaml.
+_YAML_SAFE_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@lru_cache(maxsize=1024)
+def _parse_linkable_spec_name(name: str) -> StructuredLinkableSpecName:
+    """Memoized ``StructuredLinkableSpecName.from_name``; the parsed name is read-only."""
+    return StructuredLinkableSpecName.from_name(name)
+
 
 class MetricFlowSemanticValidationException(Exception):
     """A deterministic MetricFlow query validation rejection with structured payload."""
@@ -58,6 +70,13 @@ class MetricFlowAdapter(BaseSemanticAdapter):
         super().__init__(config, service_type="metricflow")
         self.datasource = config.datasource
         self.timeout = config.timeout
+        self.cache_ttl = config.cache_ttl
+        self._cache: Dict[tuple, Tuple[float, Any]] = {}
+        self._metric_path_cache: Dict[str, Tuple[Any, Dict[str, List[str]]]] = {}
+        # MetricFlowClient is not documented as thread-safe; query/explain run one at a time.
+        self._metricflow_lock = asyncio.Lock()
+        self._author_model_path: Optional[str] = None
+        self._author_model_path_key: Optional[tuple] = None
         self._client_init_error: Optional[Exception] = None
         self._client_initialized = False
 
@@ -203,15 +222,19 @@ class MetricFlowAdapter(BaseSemanticAdapter):
         must treat the configured semantic_models_path as authoritative.
         """
         config_file_paths: List[str] = []
+        append = config_file_paths.append
+        join = os.path.join
+        splitext = os.path.splitext
         for root, dirs, files in os.walk(model_path):
             dirs[:] = [directory for directory in dirs if not directory.startswith(".")]
             for file_name in files:
                 if file_name.startswith("."):
                     continue
-                if Path(file_name).suffix.lower() not in {".yml", ".yaml"}:
+                if splitext(file_name)[1].lower() not in {".yml", ".yaml"}:
                     continue
-                config_file_paths.append(os.path.join(root, file_name))
-        return sorted(config_file_paths)
+                append(join(root, file_name))
+        config_file_paths.sort()
+        return config_file_paths
 
     @classmethod
     def _model_build_result_from_config(cls, handler, raise_issues_as_exceptions: bool = True):
@@ -293,17 +316,17 @@ class MetricFlowAdapter(BaseSemanticAdapter):
         if not isinstance(tags, list):
             return None
 
+        prefix = "subject_tree:"
         for raw_tag in tags:
             if not isinstance(raw_tag, str):
                 continue
-            tag = raw_tag.strip()
-            if not tag:
+            tag = raw_tag.lstrip()
+            if not tag.startswith(prefix):
                 continue
-            if tag.startswith("subject_tree:"):
-                tag = tag.split(":", 1)[1].strip()
-                path = [part.strip() for part in tag.split("/") if part.strip()]
-                if path:
-                    return path
+            # Each segment is stripped once; empty segments (a//b, trailing /) drop out.
+            path = [part for part in map(str.strip, tag[len(prefix) :].split("/")) if part]
+            if path:
+                return path
         return None
 
     @classmethod
@@ -311,8 +334,10 @@ class MetricFlowAdapter(BaseSemanticAdapter):
         metric_paths: Dict[str, List[str]] = {}
         try:
             with open(file_path, encoding="utf-8") as handle:
-                docs = yaml.safe_load_all(handle)
-                for doc in docs:
+                text = handle.read()
+            # Only subject_tree tags produce a path; data_source-only files skip the YAML parse.
+            if "subject_tree:" in text:
+                for doc in yaml.load_all(text, Loader=_YAML_SAFE_LOADER):
                     if not isinstance(doc, dict):
                         continue
                     metric = doc.get("metric")
@@ -341,9 +366,24 @@ class MetricFlowAdapter(BaseSemanticAdapter):
             logger.debug("Unable to collect metric path metadata: %s", exc)
             return {}
 
+        # Re-parse only files whose (mtime_ns, size) changed since the last scan.
+        previous = self._metric_path_cache
+        current: Dict[str, Tuple[Any, Dict[str, List[str]]]] = {}
         metric_paths: Dict[str, List[str]] = {}
         for file_path in file_paths:
-            metric_paths.update(self._metric_path_metadata_from_yaml_file(file_path))
+            try:
+                stat = os.stat(file_path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                signature = None
+            cached = previous.get(file_path)
+            if signature is not None and cached is not None and cached[0] == signature:
+                file_metric_paths = cached[1]
+            else:
+                file_metric_paths = self._metric_path_metadata_from_yaml_file(file_path)
+            current[file_path] = (signature, file_metric_paths)
+            metric_paths.update(file_metric_paths)
+        self._metric_path_cache = current
         return metric_paths
 
     @classmethod
@@ -417,6 +457,27 @@ class MetricFlowAdapter(BaseSemanticAdapter):
 
         return metadata
 
+    def _cache_get(self, key: tuple) -> Optional[List[Any]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, models = entry
+        if expires_at <= time.monotonic():
+            del self._cache[key]
+            return None
+        # Hand out copies so callers cannot mutate the cached models.
+        return [model.model_copy(deep=True) for model in models]
+
+    def _cache_put(self, key: tuple, models: List[Any]) -> None:
+        if self.cache_ttl <= 0:
+            return
+        now = time.monotonic()
+        # Keys differ by path/limit/offset/metric, so drop expired entries rather
+        # than waiting for the same key to be read again.
+        for expired in [k for k, (expires_at, _) in self._cache.items() if expires_at <= now]:
+            del self._cache[expired]
+        self._cache[key] = (now + self.cache_ttl, [model.model_copy(deep=True) for model in models])
+
     # Metrics Interface
 
     async def list_metrics(
@@ -436,6 +497,11 @@ class MetricFlowAdapter(BaseSemanticAdapter):
         Returns:
             List of metric definitions
         """
+        cache_key = ("list_metrics", tuple(path or ()), limit, offset)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
         client = self._ensure_client_ready()
 
         # Get full metric objects directly from semantic_model
@@ -444,9 +510,17 @@ class MetricFlowAdapter(BaseSemanticAdapter):
         full_metrics = metric_semantics.get_metrics(metric_refs)
         path_by_name = self._metric_path_metadata_by_name()
 
-        # Convert to MetricDefinition list
+        if path:
+            full_metrics = [
+                metric
+                for metric in full_metrics
+                if (metric_path := path_by_name.get(metric.name))
+                and metric_path[: len(path)] == path
+            ]
+
+        # Dimension lookup is the per-metric cost, so only pay it for the page returned.
         metrics = []
-        for metric in full_metrics:
+        for metric in full_metrics[offset : offset + limit]:
             # Get dimensions for this metric
             dimensions = client.engine.simple_dimensions_for_metrics([metric.name])
             metrics.append(
@@ -461,10 +535,8 @@ class MetricFlowAdapter(BaseSemanticAdapter):
                 )
             )
 
-        if path:
-            metrics = [m for m in metrics if m.path and m.path[: len(path)] == path]
-
-        return metrics[offset : offset + limit]
+        self._cache_put(cache_key, metrics)
+        return metrics
 
     async def get_dimensions(
         self,
@@ -481,13 +553,47 @@ class MetricFlowAdapter(BaseSemanticAdapter):
         Returns:
             List of DimensionInfo objects containing name and description
         """
+        cache_key = ("get_dimensions", metric_name)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
         client = self._ensure_client_ready()
 
         # Get dimensions from client (returns List[Dimension])
         dimensions = client.list_dimensions(metric_names=[metric_name])
 
-        # Convert to DimensionInfo objects
-        return [DimensionInfo(name=d.name, description=d.description) for d in dimensions]
+        # Convert to DimensionInfo objects; MetricFlow's Dimension fields already match
+        result = [
+            DimensionInfo.model_construct(name=d.name, description=d.description)
+            for d in dimensions
+        ]
+        self._cache_put(cache_key, result)
+        return result
+
+    async def get_dimensions_many(
+        self,
+        metric_names: List[str],
+        path: Optional[List[str]] = None,
+    ) -> Dict[str, List[DimensionInfo]]:
+        """
+        Get dimensions for several metrics in one call.
+
+        Each lookup is a synchronous, in-process call against the loaded
+        semantic model with no I/O to overlap, so lookups run one after another;
+        duplicates are resolved once and repeated names hit the result cache.
+
+        Args:
+            metric_names: Names of the metrics
+            path: Optional subject area filter
+
+        Returns:
+            Mapping of metric name to its DimensionInfo list, in request order
+        """
+        return {
+            metric_name: await self.get_dimensions(metric_name, path=path)
+            for metric_name in dict.fromkeys(metric_names)
+        }
 
     @staticmethod
     def _normalize_time_granularity(granularity: Optional[str]) -> Optional[str]:
@@ -500,6 +606,9 @@ class MetricFlowAdapter(BaseSemanticAdapter):
 
     @classmethod
     def _time_grain_from_text(cls, value: Any) -> Optional[str]:
+        # Most window / grain / offset sources are unset; skip the str/lower round-trip.
+        if value is None:
+            return None
         text = str(cls._metricflow_metadata_value(value) or "").lower()
         for grain in cls._TIME_GRAINS:
             if grain in text:
@@ -508,7 +617,7 @@ class MetricFlowAdapter(BaseSemanticAdapter):
 
     @staticmethod
     def _is_metric_time_dimension(name: str) -> bool:
-        parsed = StructuredLinkableSpecName.from_name(str(name).lower())
+        parsed = _parse_linkable_spec_name(str(name).lower())
         return parsed.element_name == "metric_time"
 
     @classmethod
@@ -796,7 +905,7 @@ class MetricFlowAdapter(BaseSemanticAdapter):
 
             qualified_name = getattr(spec, "qualified_name", None)
             if isinstance(qualified_name, str) and qualified_name:
-                parsed = StructuredLinkableSpecName.from_name(qualified_name.lower())
+                parsed = _parse_linkable_spec_name(qualified_name.lower())
                 names.add(parsed.qualified_name_without_granularity)
                 names.add(parsed.element_name)
 
@@ -816,7 +925,7 @@ class MetricFlowAdapter(BaseSemanticAdapter):
         if not time_dimension_names:
             return False
 
-        parsed = StructuredLinkableSpecName.from_name(name.lower())
+        parsed = _parse_linkable_spec_name(name.lower())
         return (
             parsed.element_name in time_dimension_names
             or parsed.qualified_name_without_granularity in time_dimension_names
@@ -843,7 +952,7 @@ class MetricFlowAdapter(BaseSemanticAdapter):
         time_dimension_names = cls._time_dimension_names_for_metrics(client, metrics)
         canonical_dimensions = []
         for dimension in query_dimensions:
-            parsed = StructuredLinkableSpecName.from_name(dimension.lower())
+            parsed = _parse_linkable_spec_name(dimension.lower())
             is_metric_time = parsed.element_name == "metric_time"
             is_time_dimension = cls._is_known_time_dimension_name(dimension, time_dimension_names)
             if is_metric_time or is_time_dimension:
@@ -860,7 +969,7 @@ class MetricFlowAdapter(BaseSemanticAdapter):
         for order_item in order_list:
             descending = order_item.startswith("-")
             order_name = order_item[1:] if descending else order_item
-            parsed = StructuredLinkableSpecName.from_name(order_name.lower())
+            parsed = _parse_linkable_spec_name(order_name.lower())
             is_metric_time = parsed.element_name == "metric_time"
             is_time_dimension = cls._is_known_time_dimension_name(order_name, time_dimension_names)
             if is_metric_time or is_time_dimension:
@@ -872,6 +981,29 @@ class MetricFlowAdapter(BaseSemanticAdapter):
 
         return canonical_dimensions, canonical_order
 
+    async def _run_metricflow_call(self, func, **kwargs):
+        """Run a blocking MetricFlowClient call in a worker thread, bounded by ``timeout``.
+
+        MetricFlow plans and executes synchronously (warehouse round-trips
+        included), so the call is kept off the event loop. query/explain calls
+        run one at a time: ``_metricflow_lock`` is acquired on the loop before
+        dispatching, and time spent queued counts against ``timeout``. A call
+        that times out while queued is never started. A worker thread cannot be
+        interrupted: a call that times out while running keeps running (with its
+        warehouse query) in the background and holds the lock until it finishes,
+        so a retry cannot run beside it.
+        """
+        try:
+            async with asyncio.timeout(self.timeout or None):
+                await self._metricflow_lock.acquire()
+                worker = asyncio.ensure_future(asyncio.to_thread(func, **kwargs))
+                # Released when the worker finishes, not when the caller stops waiting.
+                worker.add_done_callback(lambda _: self._metricflow_lock.release())
+                return await asyncio.shield(worker)
+        except TimeoutError:
+            logger.warning("MetricFlow call exceeded the %ss timeout", self.timeout)
+            raise
+
     async def query_metrics(
         self,
         metrics: List[str],
@@ -935,7 +1067,8 @@ class MetricFlowAdapter(BaseSemanticAdapter):
         if dry_run:
             # Use explain to get SQL without executing
             try:
-                result = client.explain(
+                result = await self._run_metricflow_call(
+                    client.explain,
                     metrics=query_metric_names,
                     dimensions=query_dimensions,
                     start_time=start_time,
@@ -960,11 +1093,18 @@ class MetricFlowAdapter(BaseSemanticAdapter):
         else:
             # Execute the query
             logger.debug(
-                f"Executing query: metrics={query_metric_names}, dimensions={query_dimensions}, "
-                f"start_time={start_time}, end_time={end_time}, where={where_clause}, limit={limit}"
+                "Executing query: metrics=%s, dimensions=%s, start_time=%s, end_time=%s, "
+                "where=%s, limit=%s",
+                query_metric_names,
+                query_dimensions,
+                start_time,
+                end_time,
+                where_clause,
+                limit,
             )
             try:
-                result = client.query(
+                result = await self._run_metricflow_call(
+                    client.query,
                     metrics=query_metric_names,
                     dimensions=query_dimensions,
                     start_time=start_time,
@@ -979,7 +1119,9 @@ class MetricFlowAdapter(BaseSemanticAdapter):
                     raise
                 raise MetricFlowSemanticValidationException(payload) from exc
             logger.debug(
-                f"Query result: result_df={result.result_df is not None}, empty={result.result_df.empty if result.result_df is not None else 'N/A'}"
+                "Query result: result_df=%s, empty=%s",
+                result.result_df is not None,
+                result.result_df.empty if result.result_df is not None else "N/A",
             )
 
             # Convert DataFrame to QueryResult
@@ -988,7 +1130,11 @@ class MetricFlowAdapter(BaseSemanticAdapter):
                 # Convert to list of dicts (QueryResult.data expects List[Dict[str, Any]])
                 data = result.result_df.to_dict(orient="records")
                 metadata = {"dataflow_plan": result.dataflow_plan}
-                return QueryResult(
+                # Deliberately not validated, although this is the query_metrics
+                # return boundary: columns and rows come straight from MetricFlow's
+                # DataFrame and are already in QueryResult's shape, and validating
+                # would copy every row dict and double peak memory on large results.
+                return QueryResult.model_construct(
                     columns=columns,
                     data=data,
                     metadata=metadata,
@@ -1138,21 +1284,15 @@ class MetricFlowAdapter(BaseSemanticAdapter):
 
     def _convert_validation_results(self, results) -> List[ValidationIssue]:
         """Convert ModelValidationResults to list of ValidationIssue."""
-        issues = []
-        for error in results.errors:
-            issues.append(
-                ValidationIssue(
-                    severity="error",
-                    message=str(error),
-                )
-            )
-        for warning in results.warnings:
-            issues.append(
-                ValidationIssue(
-                    severity="warning",
-                    message=str(warning),
-                )
-            )
+        # Severity and message are produced here, so field validation would be redundant.
+        issues = [
+            ValidationIssue.model_construct(severity="error", message=str(error))
+            for error in results.errors
+        ]
+        issues.extend(
+            ValidationIssue.model_construct(severity="warning", message=str(warning))
+            for warning in results.warnings
+        )
         return issues
 
     @staticmethod
@@ -1164,16 +1304,33 @@ class MetricFlowAdapter(BaseSemanticAdapter):
     # MetricFlow YAML files (source of truth), not on the KB projection.
 
     def _author(self) -> MetricFlowMetricAuthor:
-        return MetricFlowMetricAuthor(self._resolve_model_path(self.config))
+        # Resolve (and mkdir) the model path once per set of config inputs, and
+        # again if the config changes or the directory has been removed since.
+        config = self.config
+        key = (config.semantic_models_path, config.agent_home, config.datasource)
+        model_path = self._author_model_path
+        if (
+            model_path is None
+            or key != self._author_model_path_key
+            or not os.path.isdir(model_path)
+        ):
+            model_path = self._author_model_path = self._resolve_model_path(config)
+            self._author_model_path_key = key
+        return MetricFlowMetricAuthor(model_path)
 
     def _invalidate_client_cache(self) -> None:
         """Drop the cached MetricFlowClient so the next read reloads the YAML.
 
         The client caches the parsed semantic model, so after an authoring
         mutation subsequent list_metrics / query_metrics / get_dimensions must
-        rebuild it via _ensure_client_ready() to see the change.
+        rebuild it via _ensure_client_ready() to see the change. Cached
+        list_metrics / get_dimensions results and per-file subject paths are
+        dropped for the same reason: a same-size rewrite within the filesystem's
+        timestamp granularity would keep its (mtime_ns, size) signature.
         """
         self._client_initialized = False
+        self._cache = {}
+        self._metric_path_cache = {}
 
     def read_metric_source(
         self,
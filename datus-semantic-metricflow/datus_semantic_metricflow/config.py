@@ -9,7 +9,18 @@ class MetricFlowConfig(SemanticAdapterConfig):
 
     service_type: str = Field(default="metricflow", description="Service type")
     config_path: Optional[str] = Field(None, description="Path to MetricFlow configuration file")
-    timeout: int = Field(default=300, description="Query timeout in seconds")
+    timeout: int = Field(
+        default=300,
+        description=(
+            "Query timeout in seconds, including time spent queued behind an earlier "
+            "query/explain call on this adapter. A timed-out query is not cancelled: it "
+            "keeps running in the warehouse, and later queries wait for it to finish."
+        ),
+    )
+    cache_ttl: float = Field(
+        default=30.0,
+        description="Seconds to reuse list_metrics / get_dimensions results; 0 disables caching",
+    )
     db_config: Optional[Dict[str, str]] = Field(
         None,
         description=(
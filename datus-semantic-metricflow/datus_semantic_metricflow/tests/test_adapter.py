@@ -1,7 +1,12 @@
+import asyncio
+import os
+import threading
+import time
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
+import yaml
 from metricflow.time.time_granularity import TimeGranularity
 
 from datus_semantic_metricflow import MetricFlowAdapter, MetricFlowConfig
@@ -167,9 +172,15 @@ def adapter():
     instance.service_type = "metricflow"
     instance.datasource = "test"
     instance.timeout = 300
+    instance.cache_ttl = 0
+    instance._cache = {}
+    instance._metric_path_cache = {}
     instance.client = MagicMock()
     instance._client_initialized = True
     instance._config_handler = MagicMock()
+    instance._metricflow_lock = asyncio.Lock()
+    instance._author_model_path = None
+    instance._author_model_path_key = None
     return instance
 
 
@@ -189,6 +200,71 @@ class TestMetricFlowAdapterAuthoringCacheInvalidation:
         adapter.delete_metric_source("m")
         assert adapter._client_initialized is False
 
+    def test_write_metric_source_drops_cached_metric_paths(self, adapter, tmp_path):
+        metric_file = tmp_path / "metrics.yml"
+        metric_file.write_text(
+            """
+metric:
+  name: revenue
+  locked_metadata:
+    tags:
+      - "subject_tree: sales/a"
+""",
+            encoding="utf-8",
+        )
+        adapter._author = lambda: SimpleNamespace(write=lambda *a, **k: SimpleNamespace(name="m"))
+
+        with patch("metricflow.engine.utils.path_to_models", return_value=str(tmp_path)):
+            assert adapter._metric_path_metadata_by_name() == {"revenue": ["sales", "a"]}
+
+            # Same size, same mtime: the (mtime_ns, size) signature cannot see the edit.
+            stat = metric_file.stat()
+            metric_file.write_text(
+                metric_file.read_text(encoding="utf-8").replace("sales/a", "sales/b"),
+                encoding="utf-8",
+            )
+            os.utime(metric_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            adapter.write_metric_source("m", "metric:\n  name: m\n  type: aggregate\n")
+
+            assert adapter._metric_path_metadata_by_name() == {"revenue": ["sales", "b"]}
+
+
+class TestMetricFlowAdapterAuthorModelPath:
+    def test_author_resolves_model_path_once(self, adapter, tmp_path):
+        adapter.config = MetricFlowConfig(
+            datasource="test", semantic_models_path=str(tmp_path / "models")
+        )
+
+        with patch.object(
+            MetricFlowAdapter,
+            "_resolve_model_path",
+            wraps=MetricFlowAdapter._resolve_model_path,
+        ) as mock_resolve:
+            adapter._author()
+            adapter._author()
+            assert mock_resolve.call_count == 1
+
+            (tmp_path / "models").rmdir()
+            adapter._author()
+
+        assert mock_resolve.call_count == 2
+        assert (tmp_path / "models").is_dir()
+
+    def test_author_re_resolves_model_path_when_config_changes(self, adapter, tmp_path):
+        adapter.config = MetricFlowConfig(
+            datasource="test", semantic_models_path=str(tmp_path / "models")
+        )
+        adapter._author()
+        assert adapter._author_model_path == str(tmp_path / "models")
+
+        adapter.config.semantic_models_path = str(tmp_path / "other")
+        adapter._author()
+        assert adapter._author_model_path == str(tmp_path / "other")
+
+        adapter.config = MetricFlowConfig(datasource="test", agent_home=str(tmp_path / "home"))
+        adapter._author()
+        assert adapter._author_model_path == str(tmp_path / "home" / "semantic_models" / "test")
+
 
 class TestMetricFlowAdapter:
     def test_resolve_model_path_uses_agent_home_and_datasource(self):
@@ -629,13 +705,18 @@ class TestMetricFlowAdapter:
         metric_semantics.metric_references = ["revenue", "orders"]
         metric_semantics.get_metrics.return_value = [metric1, metric2]
         adapter.client.semantic_model.metric_semantics = metric_semantics
-        adapter.client.engine.simple_dimensions_for_metrics.side_effect = [
-            [SimpleNamespace(name="date"), SimpleNamespace(name="region")],
-            [SimpleNamespace(name="date")],
-        ]
+        dimensions_by_metric = {
+            "revenue": [SimpleNamespace(name="date"), SimpleNamespace(name="region")],
+            "orders": [SimpleNamespace(name="date")],
+        }
+        adapter.client.engine.simple_dimensions_for_metrics.side_effect = (
+            lambda metric_names: dimensions_by_metric[metric_names[0]]
+        )
 
         metrics = await adapter.list_metrics(limit=1, offset=1)
 
+        adapter.client.engine.simple_dimensions_for_metrics.assert_called_once_with(["orders"])
+
         assert metrics == [
             MetricDefinition(
                 name="orders",
@@ -647,6 +728,76 @@ class TestMetricFlowAdapter:
             )
         ]
 
+    @pytest.mark.asyncio
+    async def test_list_metrics_reuses_cached_result_within_ttl(self, adapter):
+        adapter.cache_ttl = 30
+        metric_semantics = MagicMock()
+        metric_semantics.metric_references = ["revenue"]
+        metric_semantics.get_metrics.return_value = [
+            SimpleNamespace(name="revenue", description=None, type="simple", input_measures=[])
+        ]
+        adapter.client.semantic_model.metric_semantics = metric_semantics
+        adapter.client.engine.simple_dimensions_for_metrics.return_value = []
+
+        first = await adapter.list_metrics()
+        second = await adapter.list_metrics()
+
+        assert first == second
+        assert first is not second
+        metric_semantics.get_metrics.assert_called_once()
+
+        adapter._invalidate_client_cache()
+        adapter._client_initialized = True
+        await adapter.list_metrics()
+
+        assert metric_semantics.get_metrics.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_get_dimensions_cache_expires_after_ttl(self, adapter):
+        adapter.cache_ttl = 30
+        adapter.client.list_dimensions.return_value = [
+            SimpleNamespace(name="date", description="Calendar date"),
+        ]
+
+        with patch("datus_semantic_metricflow.adapter.time.monotonic", return_value=100.0):
+            await adapter.get_dimensions("revenue")
+            await adapter.get_dimensions("revenue")
+        assert adapter.client.list_dimensions.call_count == 1
+
+        with patch("datus_semantic_metricflow.adapter.time.monotonic", return_value=131.0):
+            await adapter.get_dimensions("revenue")
+        assert adapter.client.list_dimensions.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_get_dimensions_cache_returns_copies(self, adapter):
+        adapter.cache_ttl = 30
+        adapter.client.list_dimensions.return_value = [
+            SimpleNamespace(name="date", description="Calendar date"),
+        ]
+
+        first = await adapter.get_dimensions("revenue")
+        first[0].description = "mutated"
+        first.clear()
+        second = await adapter.get_dimensions("revenue")
+        second[0].description = "mutated again"
+        third = await adapter.get_dimensions("revenue")
+
+        assert third == [DimensionInfo(name="date", description="Calendar date")]
+        assert adapter.client.list_dimensions.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_put_prunes_expired_entries(self, adapter):
+        adapter.cache_ttl = 30
+        adapter.client.list_dimensions.return_value = []
+
+        with patch("datus_semantic_metricflow.adapter.time.monotonic", return_value=100.0):
+            await adapter.get_dimensions("revenue")
+            await adapter.get_dimensions("orders")
+        with patch("datus_semantic_metricflow.adapter.time.monotonic", return_value=131.0):
+            await adapter.get_dimensions("users")
+
+        assert list(adapter._cache) == [("get_dimensions", "users")]
+
     @pytest.mark.asyncio
     async def test_list_metrics_includes_derived_offset_metadata(self, adapter):
         metric = SimpleNamespace(
@@ -730,6 +881,72 @@ metric:
             "revenue_mom": ["commerce", "revenue", "orders"]
         }
 
+    def test_metric_path_metadata_from_yaml_file_skips_files_without_subject_tree(self, tmp_path):
+        model_file = tmp_path / "orders.yml"
+        model_file.write_text("data_source:\n  name: orders\n", encoding="utf-8")
+
+        with patch("datus_semantic_metricflow.adapter.yaml.load_all") as mock_load_all:
+            result = MetricFlowAdapter._metric_path_metadata_from_yaml_file(str(model_file))
+
+        assert result == {}
+        mock_load_all.assert_not_called()
+
+    def test_metric_path_metadata_from_yaml_file_without_libyaml(self, tmp_path):
+        metric_file = tmp_path / "metrics.yml"
+        metric_file.write_text(
+            """
+metric:
+  name: revenue
+  type: measure_proxy
+  locked_metadata:
+    tags:
+      - "subject_tree: commerce/revenue"
+""",
+            encoding="utf-8",
+        )
+
+        with patch("datus_semantic_metricflow.adapter._YAML_SAFE_LOADER", yaml.SafeLoader):
+            result = MetricFlowAdapter._metric_path_metadata_from_yaml_file(str(metric_file))
+
+        assert result == {"revenue": ["commerce", "revenue"]}
+
+    def test_metric_path_metadata_by_name_reparses_only_changed_files(self, adapter, tmp_path):
+        metric_file = tmp_path / "metrics.yml"
+        metric_file.write_text(
+            """
+metric:
+  name: revenue
+  locked_metadata:
+    tags:
+      - "subject_tree: commerce/revenue"
+""",
+            encoding="utf-8",
+        )
+
+        with (
+            patch("metricflow.engine.utils.path_to_models", return_value=str(tmp_path)),
+            patch.object(
+                MetricFlowAdapter,
+                "_metric_path_metadata_from_yaml_file",
+                wraps=MetricFlowAdapter._metric_path_metadata_from_yaml_file,
+            ) as mock_parse,
+        ):
+            first = adapter._metric_path_metadata_by_name()
+            second = adapter._metric_path_metadata_by_name()
+            assert mock_parse.call_count == 1
+
+            metric_file.write_text(
+                metric_file.read_text(encoding="utf-8").replace(
+                    "commerce/revenue", "commerce/revenue/orders"
+                ),
+                encoding="utf-8",
+            )
+            third = adapter._metric_path_metadata_by_name()
+
+        assert first == second == {"revenue": ["commerce", "revenue"]}
+        assert third == {"revenue": ["commerce", "revenue", "orders"]}
+        assert mock_parse.call_count == 2
+
     @pytest.mark.asyncio
     async def test_list_metrics_filters_by_locked_metadata_path(self, adapter):
         metric = SimpleNamespace(
@@ -797,6 +1014,20 @@ metric:
         ]
         adapter.client.list_dimensions.assert_called_once_with(metric_names=["revenue"])
 
+    @pytest.mark.asyncio
+    async def test_get_dimensions_many_resolves_each_metric_once(self, adapter):
+        adapter.client.list_dimensions.side_effect = lambda metric_names: [
+            SimpleNamespace(name=f"{metric_names[0]}_date", description=None)
+        ]
+
+        result = await adapter.get_dimensions_many(["revenue", "orders", "revenue"])
+
+        assert result == {
+            "revenue": [DimensionInfo(name="revenue_date")],
+            "orders": [DimensionInfo(name="orders_date")],
+        }
+        assert adapter.client.list_dimensions.call_count == 2
+
     @pytest.mark.asyncio
     async def test_query_metrics_returns_rows_as_dicts(self, adapter):
         adapter.client.query.return_value = SimpleNamespace(
@@ -829,6 +1060,126 @@ metric:
             order=None,
         )
 
+    @pytest.mark.asyncio
+    async def test_query_metrics_does_not_copy_result_rows(self, adapter):
+        rows = [{"date": "2024-01-01", "revenue": 1000}]
+        adapter.client.query.return_value = SimpleNamespace(
+            result_df=_FakeDataFrame(rows), dataflow_plan=None
+        )
+
+        result = await adapter.query_metrics(metrics=["revenue"], dimensions=["date"])
+
+        assert result.data[0] is rows[0]
+
+    @pytest.mark.asyncio
+    async def test_query_metrics_runs_metricflow_off_the_event_loop(self, adapter):
+        calling_threads = []
+
+        def fake_query(**kwargs):
+            calling_threads.append(threading.get_ident())
+            return SimpleNamespace(result_df=_FakeDataFrame([]), dataflow_plan=None)
+
+        adapter.client.query.side_effect = fake_query
+
+        await adapter.query_metrics(metrics=["revenue"])
+
+        assert calling_threads and calling_threads[0] != threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_query_metrics_serializes_concurrent_metricflow_calls(self, adapter):
+        active = []
+        overlaps = []
+
+        def fake_query(**kwargs):
+            active.append(True)
+            overlaps.append(len(active) > 1)
+            time.sleep(0.05)
+            active.pop()
+            return SimpleNamespace(result_df=_FakeDataFrame([]), dataflow_plan=None)
+
+        adapter.client.query.side_effect = fake_query
+
+        await asyncio.gather(
+            adapter.query_metrics(metrics=["revenue"]),
+            adapter.query_metrics(metrics=["orders"]),
+        )
+
+        assert overlaps == [False, False]
+
+    @pytest.mark.asyncio
+    async def test_query_metrics_raises_timeout_when_metricflow_exceeds_timeout(self, adapter):
+        adapter.timeout = 0.01
+        release = threading.Event()
+
+        def slow_query(**kwargs):
+            release.wait(5)
+            return SimpleNamespace(result_df=_FakeDataFrame([]), dataflow_plan=None)
+
+        adapter.client.query.side_effect = slow_query
+
+        try:
+            with pytest.raises(TimeoutError):
+                await adapter.query_metrics(metrics=["revenue"])
+        finally:
+            release.set()
+
+    @pytest.mark.asyncio
+    async def test_query_metrics_retry_waits_for_abandoned_timed_out_call(self, adapter):
+        adapter.timeout = 0.05
+        release = threading.Event()
+        active = []
+        overlaps = []
+
+        def fake_query(**kwargs):
+            active.append(True)
+            overlaps.append(len(active) > 1)
+            if len(overlaps) == 1:
+                release.wait(5)
+            active.pop()
+            return SimpleNamespace(result_df=_FakeDataFrame([]), dataflow_plan=None)
+
+        adapter.client.query.side_effect = fake_query
+
+        try:
+            with pytest.raises(TimeoutError):
+                await adapter.query_metrics(metrics=["revenue"])
+            adapter.timeout = 5
+            threading.Timer(0.05, release.set).start()
+            await adapter.query_metrics(metrics=["revenue"])
+        finally:
+            release.set()
+
+        assert overlaps == [False, False]
+
+    @pytest.mark.asyncio
+    async def test_query_metrics_call_timing_out_while_queued_never_runs(self, adapter):
+        release = threading.Event()
+        started = []
+
+        def fake_query(**kwargs):
+            started.append(kwargs["metrics"])
+            if len(started) == 1:
+                release.wait(5)
+            return SimpleNamespace(result_df=_FakeDataFrame([]), dataflow_plan=None)
+
+        adapter.client.query.side_effect = fake_query
+
+        try:
+            first = asyncio.ensure_future(adapter.query_metrics(metrics=["revenue"]))
+            await asyncio.sleep(0.05)
+            adapter.timeout = 0.05
+            with pytest.raises(TimeoutError):
+                await adapter.query_metrics(metrics=["orders"])
+            release.set()
+            await first
+            # Give a wrongly dispatched call time to reach the client.
+            await asyncio.sleep(0.1)
+        finally:
+            release.set()
+
+        assert started == [["revenue"]]
+        adapter.client.query.assert_called_once()
+
     @pytest.mark.asyncio
     async def test_query_metrics_adds_metric_time_dimension_for_granularity(self, adapter):
         adapter.client.query.return_value = SimpleNamespace(
@@ -1444,6 +1795,7 @@ class TestConfiguration:
         assert config.service_type == "metricflow"
         assert config.config_path is None
         assert config.timeout == 300
+        assert config.cache_ttl == 30.0
         assert config.db_config is None
         assert config.agent_home is None
 